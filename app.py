@@ -3,27 +3,215 @@
 
 from flask import Flask, request, jsonify
 import os
+import logging
+from logging.handlers import QueueHandler, QueueListener
 import re
 from datetime import datetime
-from bs4 import BeautifulSoup
-import requests
-from urllib.parse import unquote
+from bs4 import BeautifulSoup, SoupStrainer
+import asyncio
+import httpx
+from urllib.parse import urlparse, urlunparse, parse_qs, parse_qsl, urlencode, unquote_plus
 import json
 import time
+import threading
+import queue
+import hashlib
+from collections import Counter, OrderedDict, namedtuple
+from cachetools import TTLCache
+from functools import lru_cache
+from html import unescape
 
-# Optional: Anthropic for AI summaries
+# Optional: Aho-Corasick automaton for keyword matching, regex fallback otherwise
 try:
-    from anthropic import Anthropic
-    anthropic_client = Anthropic(api_key=os.environ.get('ANTHROPIC_API_KEY')) if os.environ.get('ANTHROPIC_API_KEY') else None
-except:
-    anthropic_client = None
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: orjson for faster JSON encoding/decoding, stdlib json otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: lxml tree builder for BeautifulSoup, stdlib html.parser otherwise
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Optional: selectolax (Lexbor) for parsing alert emails, BeautifulSoup otherwise
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Optional: RE2 for the extraction scanners - linear time on any input, stdlib re otherwise
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Optional: dateutil for non-ISO alert dates, ISO-8601 only otherwise
+try:
+    from dateutil import parser as date_parser
+except ImportError:
+    date_parser = None
+
+# Optional: Anthropic for AI summaries - async so Claude calls don't block the worker's event loop
+ANTHROPIC_MODEL = os.environ.get('ANTHROPIC_MODEL', 'claude-3-haiku-20240307')
+ANTHROPIC_MAX_CONCURRENCY = int(os.environ.get('ANTHROPIC_MAX_CONCURRENCY', 4))
+try:
+    from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+except ImportError:
+    AsyncAnthropic = None
 
 app = Flask(__name__)
 
+# Logging - handlers run on a listener thread so alert processing never blocks on stdout
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+logger.propagate = False
+_log_queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(threadName)s] %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_handler)
+logger.addHandler(QueueHandler(_log_queue))
+_log_listener.start()
+
+# Built once the logger exists - a client that can't be built is logged, not silently dropped
+anthropic_client = None
+if AsyncAnthropic is not None and os.environ.get('ANTHROPIC_API_KEY'):
+    try:
+        anthropic_client = AsyncAnthropic(
+            api_key=os.environ.get('ANTHROPIC_API_KEY'),
+            # Keep-alive pool sized to the concurrency cap so the TLS session is reused across calls
+            http_client=DefaultAsyncHttpxClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=ANTHROPIC_MAX_CONCURRENCY,
+                    max_keepalive_connections=ANTHROPIC_MAX_CONCURRENCY
+                )
+            )
+        )
+    except Exception as e:
+        logger.warning("Anthropic client disabled, using pattern matching: %s", e)
+elif os.environ.get('ANTHROPIC_API_KEY'):
+    logger.warning("ANTHROPIC_API_KEY is set but the anthropic package isn't installed - using pattern matching")
+
 # Configuration - Now using environment variables
 SMARTSUITE_API_KEY = os.environ.get('SMARTSUITE_API_KEY')
 SMARTSUITE_WORKSPACE = os.environ.get('SMARTSUITE_WORKSPACE', 'sxs77u60')
 SMARTSUITE_TABLE_ID = os.environ.get('SMARTSUITE_TABLE_ID', '68517b0036a5ddf3941ea848')
+SMARTSUITE_BULK_URL = f"https://app.smartsuite.com/api/v1/applications/{SMARTSUITE_TABLE_ID}/records/bulk/"
+SMARTSUITE_HEADERS = {
+    "Authorization": f"Token {SMARTSUITE_API_KEY}",
+    "ACCOUNT-ID": SMARTSUITE_WORKSPACE
+} if SMARTSUITE_API_KEY else None
+
+# Jina Reader - request headers are fixed, so they live on the shared client
+JINA_READER_URL = "https://r.jina.ai/"
+JINA_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/plain'
+}
+
+# Concurrency - alerts are processed concurrently, API calls are capped to respect rate limits
+ANTHROPIC_SEMAPHORE = asyncio.Semaphore(ANTHROPIC_MAX_CONCURRENCY)
+SMARTSUITE_LOCK = asyncio.Lock()  # serializes the SENT_URLS check + bulk insert
+
+# Background processing - the webhook only queues emails, one worker thread's event loop processes
+# several at once so their network waits overlap
+ALERT_QUEUE = queue.Queue()
+ALERT_LOOP = asyncio.new_event_loop()
+MAX_CONCURRENT_JOBS = int(os.environ.get('MAX_CONCURRENT_JOBS', 4))
+MAX_RECENT_JOBS = 1000
+RECENT_JOBS = OrderedDict()  # job_id -> status dict, oldest first - served by /status/<job_id>
+RECENT_JOBS_LOCK = threading.Lock()
+
+# Dedupe caches keyed by URL / article hash - the same article often shows up in several emails
+CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 3600))
+ARTICLE_CACHE = TTLCache(maxsize=512, ttl=CACHE_TTL_SECONDS)  # url key -> fetched article data
+AI_CACHE = TTLCache(maxsize=1024, ttl=CACHE_TTL_SECONDS)  # (model, content hash, headline) -> extracted info
+ANALYSIS_CACHE = TTLCache(maxsize=1024, ttl=CACHE_TTL_SECONDS)  # (url key, headline) -> analysis fields
+SENT_URLS = TTLCache(maxsize=4096, ttl=CACHE_TTL_SECONDS)  # url key -> True once sent to SmartSuite
+CACHE_LOCK = threading.Lock()  # TTLCache isn't thread safe
+
+# Skip the article fetch and AI call when the headline alone names the company, location and job
+# count - faster, but the lead gets the pattern summary instead of the AI one
+HEADLINE_SHORTCUT = os.environ.get('HEADLINE_SHORTCUT', '').lower() in ('1', 'true', 'yes')
+
+def create_http_client(timeout, headers=None):
+    """Build a pooled keep-alive async client - only used from the worker thread's event loop"""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=timeout,
+        headers=headers,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        # Connection errors are retried here - status codes are retried per call where safe
+        transport=httpx.AsyncHTTPTransport(http2=True, retries=3)
+    )
+
+# Shared HTTP clients - connections to Jina and SmartSuite are reused across alerts
+JINA_CLIENT = create_http_client(timeout=30, headers=JINA_HEADERS)
+SMARTSUITE_CLIENT = create_http_client(timeout=10, headers=SMARTSUITE_HEADERS)
+
+async def send_with_retries(client, method, url, retry_statuses=(), retries=0, **kwargs):
+    """Send a streamed request, retrying the given statuses with backoff - caller must aclose()"""
+    for attempt in range(retries + 1):
+        response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+        if response.status_code not in retry_statuses or attempt == retries:
+            return response
+        await response.aclose()
+        await asyncio.sleep(0.3 * 2 ** attempt)
+
+async def read_limited(response, max_bytes):
+    """Read a streamed response body, stopping once max_bytes have arrived"""
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) >= max_bytes:
+            break
+    return bytes(body[:max_bytes])
+
+# Jina only retries rate limiting / unavailable - other errors mean the target page failed and
+# re-running a 30s extraction won't change the answer
+JINA_RETRIES = 2
+JINA_RETRY_STATUSES = (429, 503)
+
+# Only rows (with everything inside them) and stray links are used from the alert email
+ALERT_EMAIL_STRAINER = SoupStrainer(['tr', 'a'])
+
+# Google's own links (manage alerts, help) plus mailto and in-page anchors - one scan per href
+SKIP_LINK_RE = re.compile(r'google\.com/alerts|support\.google|mailto:|^#')
+
+# Alert emails are machine generated - every alert is a Google redirect link followed by a green
+# source label, so the common case needs no DOM at all
+ALERT_LINK_RE = re.compile(r'<a\s[^>]*?href="(https://www\.google\.com/url\?[^"]+)"[^>]*>(.*?)</a>', re.DOTALL | re.IGNORECASE)
+SOURCE_RE = re.compile(
+    r'<(font|span)\s[^>]*?(?:color="#006621"|style="[^"]*006621[^"]*")[^>]*>(.*?)</\1>',
+    re.DOTALL | re.IGNORECASE
+)
+TAG_RE = re.compile(r'<[^>]+>')
+SOURCE_WINDOW = 1000  # chars after an alert's link searched for its source label
+
+def json_response(payload, status=200):
+    """JSON response, encoded with orjson when available"""
+    if orjson:
+        return app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+    response = jsonify(payload)
+    response.status_code = status
+    return response
+
+def json_loads(text):
+    """Parse JSON with orjson when available"""
+    return orjson.loads(text) if orjson else json.loads(text)
+
+def json_dumps(payload):
+    """Encode JSON to bytes with orjson when available"""
+    return orjson.dumps(payload) if orjson else json.dumps(payload).encode('utf-8')
+
+JSON_CONTENT_TYPE = {'Content-Type': 'application/json'}
 
 @app.route('/')
 def home():
@@ -31,16 +219,17 @@ def home():
     <h1>Google Alerts to SmartSuite Webhook</h1>
     <p>Status: Running ✅</p>
     <p>Endpoint: POST /webhook</p>
+    <p>Job status: GET /status/&lt;job_id&gt;</p>
     <p>Using: Jina Reader + Claude AI</p>
     """
 
 @app.route('/webhook', methods=['POST'])
 def process_google_alert():
-    """Receive Google Alert from Zapier and process it"""
+    """Receive Google Alert from Zapier and queue it for background processing"""
     try:
         # Get data from Zapier
-        data = request.json
-        print(f"Received webhook data: {data.keys()}")
+        data = json_loads(request.get_data())
+        logger.info("Received webhook data: %s", list(data.keys()))
         
         # Extract email data
         email_body = data.get('body_html', '') or data.get('body_plain', '')
@@ -48,228 +237,569 @@ def process_google_alert():
         email_date = data.get('date', datetime.now().isoformat())
         
         if not email_body:
-            return jsonify({
+            return json_response({
                 'status': 'error',
                 'message': 'No email body provided'
-            }), 400
+            }, 400)
         
-        # Parse Google Alert email
-        alerts = parse_google_alert_email(email_body, email_subject)
-        print(f"Found {len(alerts)} alerts in email")
+        # Same email -> same key, so Zapier retries don't process an email twice
+        job_id = hashlib.sha256(
+            f"{email_subject}\n{data.get('date', '')}\n{email_body}".encode('utf-8')
+        ).hexdigest()[:32]
         
-        # Process each alert
-        results = []
-        for i, alert in enumerate(alerts):
-            print(f"\n{'='*60}")
-            print(f"Processing alert {i+1}/{len(alerts)}: {alert['headline'][:50]}...")
-            print(f"URL: {alert['url']}")
-            
-            # Fetch article content if URL exists
-            if alert['url']:
-                print(f"Fetching article content from: {alert['url']}")
-                article_data = fetch_article_with_jina(alert['url'])
-                
-                print(f"Article fetch success: {article_data['success']}")
-                print(f"Content length: {len(article_data['content'])}")
-                
-                # Use AI regardless of whether we got content
-                if anthropic_client:
-                    # Use AI to extract ALL information at once
-                    print("Using AI to extract information...")
-                    extracted_info = extract_all_info_with_ai(
-                        article_data['content'],
-                        alert['headline'],
-                        alert['url']
-                    )
-                    
-                    alert['company'] = extracted_info['company']
-                    alert['address'] = extracted_info['address']
-                    alert['estimated_jobs'] = extracted_info['jobs']
-                    alert['lead_summary'] = extracted_info['summary']
-                    
-                    print(f"AI Extracted:")
-                    print(f"  Company: {alert['company']}")
-                    print(f"  Address: {alert['address']}")
-                    print(f"  Jobs: {alert['estimated_jobs']}")
-                else:
-                    # Fallback to pattern matching
-                    print("No Anthropic client - using pattern matching")
-                    alert['company'] = extract_company_name(alert['headline'])
-                    alert['address'] = extract_location_from_headline(alert['headline'])
-                    alert['estimated_jobs'] = extract_job_numbers(alert['headline'])
-                    alert['lead_summary'] = create_detailed_summary(
-                        alert['headline'],
-                        alert['company'],
-                        alert['address'],
-                        article_data['content']
-                    )
-            else:
-                print("No URL provided")
-                alert['lead_summary'] = "No article URL provided"
-            
-            alert['date'] = email_date
-            
-            print(f"Final alert data:")
-            print(f"  Company: {alert['company']}")
-            print(f"  Address: {alert['address']}")
-            print(f"  Jobs: {alert['estimated_jobs']}")
-            print(f"  Summary: {alert['lead_summary'][:100]}...")
-            
-            # Send to SmartSuite
-            success, message = send_to_smartsuite(alert)
-            
-            results.append({
-                'headline': alert['headline'],
-                'company': alert['company'],
-                'success': success,
-                'message': message
-            })
+        with RECENT_JOBS_LOCK:
+            # A failed job runs again - replaying the email is how it's retried once the outage is fixed
+            previous = RECENT_JOBS.get(job_id)
+            duplicate = previous is not None and previous['status'] != 'error'
+            if not duplicate:
+                RECENT_JOBS[job_id] = {'status': 'queued', 'queued_at': time.time()}
+                RECENT_JOBS.move_to_end(job_id)
+                while len(RECENT_JOBS) > MAX_RECENT_JOBS:
+                    RECENT_JOBS.popitem(last=False)
+        
+        if duplicate:
+            logger.info("Duplicate delivery of job %s - already %s", job_id, previous['status'])
+        else:
+            ALERT_QUEUE.put((job_id, email_body, email_subject, email_date))
+            logger.info("Queued job %s (%d waiting)", job_id, ALERT_QUEUE.qsize())
         
-        # Return results
-        return jsonify({
-            'status': 'success',
-            'processed': len(results),
-            'sent_to_smartsuite': sum(1 for r in results if r['success']),
-            'results': results
-        })
+        # Acknowledge right away - the worker thread does the slow part
+        return json_response({
+            'status': 'accepted',
+            'job_id': job_id,
+            'duplicate': duplicate
+        }, 202)
         
     except Exception as e:
-        print(f"Error processing webhook: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({
+        logger.exception("Error processing webhook: %s", e)
+        return json_response({
             'status': 'error',
             'message': str(e)
-        }), 500
+        }, 500)
+
+@app.route('/status/<job_id>')
+def job_status(job_id):
+    """Outcome of a queued job - only the last MAX_RECENT_JOBS jobs are kept"""
+    with RECENT_JOBS_LOCK:
+        job = RECENT_JOBS.get(job_id)
+        job = dict(job) if job else None
+    
+    if job is None:
+        return json_response({
+            'status': 'error',
+            'message': 'Unknown job'
+        }, 404)
+    
+    job['job_id'] = job_id
+    return json_response(job)
+
+def update_job_status(job_id, **fields):
+    """Record progress on a queued job - a job already evicted from RECENT_JOBS is ignored"""
+    with RECENT_JOBS_LOCK:
+        job = RECENT_JOBS.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+async def process_alert_email(email_body, email_subject, email_date):
+    """Run the full pipeline for one Google Alert email"""
+    # Parse Google Alert email
+    alerts = parse_google_alert_email(email_body, email_subject)
+    logger.info("Found %d alerts in email", len(alerts))
+    
+    # Different Google redirects can resolve to the same article - keep the first one
+    alerts = dedupe_alerts(alerts)
+    
+    # Alerts analyzed in an earlier email reuse that analysis - no fetch, no AI call
+    pending = [alert for alert in alerts if not apply_cached_analysis(alert)]
+    if len(pending) < len(alerts):
+        logger.info("Analysis cache hits: %d/%d", len(alerts) - len(pending), len(alerts))
+    
+    if HEADLINE_SHORTCUT and pending:
+        pending_count = len(pending)
+        pending = [alert for alert in pending if not fill_from_headline(alert)]
+        logger.info("Headline shortcut hits: %d/%d", pending_count - len(pending), pending_count)
+    
+    # Fetch every article concurrently - each fetch is I/O bound on Jina
+    articles = await asyncio.gather(*[fetch_alert_article(alert) for alert in pending])
+    
+    # Extract company, address, jobs and summary for all alerts at once
+    await analyze_alerts(pending, articles)
+    
+    # Send everything to SmartSuite in a single bulk request
+    for alert in alerts:
+        alert['date'] = email_date
+    results = await send_alerts_to_smartsuite(alerts)
+    
+    return {
+        'processed': len(results),
+        'sent_to_smartsuite': sum(1 for r in results if r['success']),
+        'results': results
+    }
+
+async def run_alert_job(job_id, email_body, email_subject, email_date):
+    """Process one queued email and log the outcome"""
+    try:
+        logger.info("Processing job %s", job_id)
+        update_job_status(job_id, status='processing')
+        summary = await process_alert_email(email_body, email_subject, email_date)
+        logger.info("Job %s done: %d/%d sent to SmartSuite", job_id, summary['sent_to_smartsuite'], summary['processed'])
+        # Alerts SmartSuite didn't take (missing key, API error) fail the job so a replay retries it
+        failed = sum(1 for r in summary['results'] if not r['success'] and r['message'] != DUPLICATE_ALERT_MESSAGE)
+        if failed:
+            update_job_status(job_id, status='error', finished_at=time.time(), message=f"{failed} alerts not sent to SmartSuite", **summary)
+        else:
+            update_job_status(job_id, status='done', finished_at=time.time(), **summary)
+    except Exception as e:
+        logger.exception("Error processing job %s: %s", job_id, e)
+        update_job_status(job_id, status='error', finished_at=time.time(), message=str(e))
+
+def alert_worker():
+    """Run the alert event loop - runs forever in a daemon thread"""
+    # One event loop for the life of the thread so the HTTP clients keep their connections
+    asyncio.set_event_loop(ALERT_LOOP)
+    ALERT_LOOP.run_forever()
+
+def alert_dispatcher():
+    """Hand queued emails to the event loop, at most MAX_CONCURRENT_JOBS at a time - runs forever in a daemon thread"""
+    slots = threading.BoundedSemaphore(MAX_CONCURRENT_JOBS)
+    
+    def job_finished(future):
+        slots.release()
+        ALERT_QUEUE.task_done()
+    
+    while True:
+        slots.acquire()
+        job = ALERT_QUEUE.get()
+        asyncio.run_coroutine_threadsafe(run_alert_job(*job), ALERT_LOOP).add_done_callback(job_finished)
+
+def canonicalize_url(url):
+    """Normalize a URL so one article maps to one key - lower-case host, no utm_* params"""
+    parsed = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if not k.lower().startswith('utm_')]
+    return urlunparse(parsed._replace(
+        scheme=parsed.scheme.lower(),
+        netloc=parsed.netloc.lower(),
+        query=urlencode(query),
+        fragment=''
+    ))
+
+def url_key(url):
+    """Compact cache key for a URL"""
+    return hashlib.blake2b(canonicalize_url(url).encode('utf-8'), digest_size=16).digest()
+
+def cache_get(cache, key):
+    """Thread-safe cache lookup"""
+    with CACHE_LOCK:
+        return cache.get(key)
+
+def cache_set(cache, key, value):
+    """Thread-safe cache store"""
+    with CACHE_LOCK:
+        cache[key] = value
+
+# Alert fields filled in by analyze_alerts
+ANALYSIS_FIELDS = ('company', 'address', 'estimated_jobs', 'lead_summary')
+
+def analysis_key(alert):
+    """The same article under the same headline gets the same analysis"""
+    return (url_key(alert['url']), alert['headline'])
+
+def apply_cached_analysis(alert):
+    """Fill an alert from an earlier analysis of the same article - True on a cache hit"""
+    if not alert['url']:
+        return False
+    cached = cache_get(ANALYSIS_CACHE, analysis_key(alert))
+    if not cached:
+        return False
+    alert.update(cached)
+    return True
+
+def fill_from_headline(alert):
+    """Fill an alert from its headline alone if that names company, location and jobs - True if it did"""
+    info = scan_headline(alert['headline'])
+    if not (info['company'] and info['address'] and info['jobs']):
+        return False
+    alert['company'] = info['company']
+    alert['address'] = info['address']
+    alert['estimated_jobs'] = info['jobs']
+    # The headline is all the content this summary gets
+    alert['lead_summary'] = create_detailed_summary(alert['headline'], info['company'], info['address'], alert['headline'])
+    return True
+
+def dedupe_alerts(alerts):
+    """Drop alerts whose URL already appeared earlier in the same email"""
+    seen = set()
+    unique = []
+    for alert in alerts:
+        if alert['url']:
+            key = url_key(alert['url'])
+            if key in seen:
+                logger.info("Skipping duplicate alert: %.50s...", alert['headline'])
+                continue
+            seen.add(key)
+        unique.append(alert)
+    return unique
+
+async def fetch_alert_article(alert):
+    """Fetch the article behind an alert - returns None when there is no URL"""
+    if not alert['url']:
+        logger.info("No URL provided for: %.50s...", alert['headline'])
+        return None
+    
+    key = url_key(alert['url'])
+    article_data = cache_get(ARTICLE_CACHE, key)
+    if article_data:
+        logger.debug("Article cache hit: %s", alert['url'])
+        return article_data
+    
+    logger.debug("Fetching article content from: %s", alert['url'])
+    article_data = await fetch_article_with_jina(alert['url'])
+    logger.info("Article fetch success: %s (%d chars) - %s", article_data['success'], len(article_data['content']), alert['url'])
+    
+    # Only cache real articles - failures may be temporary
+    if article_data['success']:
+        cache_set(ARTICLE_CACHE, key, article_data)
+    return article_data
+
+async def analyze_alerts(alerts, articles):
+    """Fill company, address, jobs and summary on every alert"""
+    fetched = [(alert, article) for alert, article in zip(alerts, articles) if article]
+    
+    for alert, article in zip(alerts, articles):
+        if not article:
+            alert['lead_summary'] = "No article URL provided"
+    
+    if not fetched:
+        return
+    
+    if anthropic_client:
+        # Use AI to extract ALL information for ALL alerts in a single request
+        logger.info("Using AI to extract information for %d alerts...", len(fetched))
+        extracted = await extract_all_info_with_ai_batch([
+            (article['content'], alert['headline'], alert['url'])
+            for alert, article in fetched
+        ])
+    else:
+        # Fallback to pattern matching
+        logger.info("No Anthropic client - using pattern matching")
+        extracted = [
+            extract_all_info_with_patterns(article['content'], alert['headline'])
+            for alert, article in fetched
+        ]
+    
+    for (alert, article), info in zip(fetched, extracted):
+        alert['company'] = info['company']
+        alert['address'] = info['address']
+        alert['estimated_jobs'] = info['jobs']
+        alert['lead_summary'] = info['summary']
+        # Only cache AI analyses of real articles - failed fetches and pattern fallbacks after a
+        # Claude error may do better next time
+        if article['success'] and info.get('from_ai'):
+            cache_set(ANALYSIS_CACHE, analysis_key(alert), {field: alert[field] for field in ANALYSIS_FIELDS})
+
+async def send_alerts_to_smartsuite(alerts):
+    """Send processed alerts to SmartSuite in one bulk request and build their result entries"""
+    # Emails are processed concurrently - check, send and mark as one step so an article that
+    # appears in two emails at once is only sent once
+    async with SMARTSUITE_LOCK:
+        outcomes = await send_unsent_alerts(alerts)
+    
+    return [
+        {
+            'headline': alert['headline'],
+            'company': alert['company'],
+            'success': success,
+            'message': message
+        }
+        for alert, (success, message) in zip(alerts, outcomes)
+    ]
+
+DUPLICATE_ALERT_MESSAGE = "Duplicate article - already sent to SmartSuite"
+
+async def send_unsent_alerts(alerts):
+    """Bulk insert the alerts not already sent to SmartSuite - returns (success, message) per alert"""
+    outcomes = [None] * len(alerts)
+    to_send = []
+    
+    for i, alert in enumerate(alerts):
+        logger.debug(
+            "Final alert data:\n  Headline: %.50s...\n  Company: %s\n  Address: %s\n  Jobs: %s\n  Summary: %.100s...",
+            alert['headline'], alert['company'], alert['address'], alert['estimated_jobs'], alert['lead_summary']
+        )
+        
+        if alert['url'] and cache_get(SENT_URLS, url_key(alert['url'])):
+            logger.info("Already sent to SmartSuite: %s", alert['url'])
+            outcomes[i] = (False, DUPLICATE_ALERT_MESSAGE)
+        else:
+            to_send.append(i)
+    
+    if to_send:
+        sent = await send_batch_to_smartsuite([alerts[i] for i in to_send])
+        for i, (success, message) in zip(to_send, sent):
+            outcomes[i] = (success, message)
+            if success and alerts[i]['url']:
+                cache_set(SENT_URLS, url_key(alerts[i]['url']), True)
+    
+    return outcomes
+
+def parse_alert_html(html_content):
+    """Parse the alert email with the fast tree builder, falling back to html.parser"""
+    try:
+        return BeautifulSoup(html_content, HTML_PARSER, parse_only=ALERT_EMAIL_STRAINER)
+    except Exception as e:
+        if HTML_PARSER == 'html.parser':
+            raise
+        logger.warning("%s failed to parse email, retrying with html.parser: %s", HTML_PARSER, e)
+        return BeautifulSoup(html_content, 'html.parser', parse_only=ALERT_EMAIL_STRAINER)
+
+def is_source_marker(attrs):
+    """Google Alerts renders the article source in green (#006621)"""
+    return attrs.get('color') == '#006621' or '006621' in (attrs.get('style') or '')
+
+def scan_alert_links(html_content):
+    """One walk over the email - (href, text, source) for each row's first link, plus all links"""
+    rows = scan_alert_links_regex(html_content)
+    if rows:
+        return rows, [(href, text) for href, text, source in rows]
+    
+    logger.debug("No Google redirect links found, parsing the email...")
+    if LexborHTMLParser is not None:
+        return scan_alert_links_lexbor(html_content)
+    return scan_alert_links_soup(html_content)
+
+def html_text(fragment):
+    """Visible text of an HTML fragment - tags become spaces like stripped_strings"""
+    return unescape(TAG_RE.sub(' ', fragment)).strip()
+
+def scan_alert_links_regex(html_content):
+    """(href, text, source) for every Google redirect link, straight off the raw HTML"""
+    links = list(ALERT_LINK_RE.finditer(html_content))
+    rows = []
+    for i, match in enumerate(links):
+        # The source label sits right after the link, before the next alert's link - bounded so
+        # the last alert doesn't scan the whole footer
+        window_end = match.end() + SOURCE_WINDOW
+        if i + 1 < len(links):
+            window_end = min(window_end, links[i + 1].start())
+        source = SOURCE_RE.search(html_content, match.end(), window_end)
+        rows.append((
+            unescape(match.group(1)),
+            html_text(match.group(2)),
+            html_text(source.group(2)) if source else ''
+        ))
+    return rows
+
+# How bucket_alert_links reads one parser's elements - tag name, attribute dict, link text,
+# marker text, parent element and a stable key for a row
+TreeAdapter = namedtuple('TreeAdapter', 'tag attrs link_text text parent key')
+
+LEXBOR_ADAPTER = TreeAdapter(
+    tag=lambda node: node.tag,
+    attrs=lambda node: node.attributes,
+    link_text=lambda node: node.text(separator=' ', strip=True),
+    text=lambda node: node.text(strip=True),
+    parent=lambda node: node.parent,
+    # Lexbor hands out a new wrapper on every access - the underlying node is the identity
+    key=lambda node: node.mem_id,
+)
+
+SOUP_ADAPTER = TreeAdapter(
+    tag=lambda elem: elem.name,
+    attrs=lambda elem: elem.attrs,
+    link_text=lambda elem: ' '.join(elem.stripped_strings),
+    text=lambda elem: elem.get_text(strip=True),
+    parent=lambda elem: elem.parent,
+    key=id,
+)
+
+def enclosing_rows(elem, adapter):
+    """Keys of the rows around an element, nearest first"""
+    keys = []
+    node = adapter.parent(elem)
+    while node is not None:
+        if adapter.tag(node) == 'tr':
+            keys.append(adapter.key(node))
+        node = adapter.parent(node)
+    return keys
+
+def bucket_alert_links(elements, adapter):
+    """(href, text, source) for each row's first link, plus all links - elements are the
+    email's links and font/span tags in document order"""
+    rows = {}  # nearest row key -> [href, text, source], in document order
+    first_links = {}  # row key -> entry of the first link anywhere inside that row
+    markers = []  # (enclosing row keys, text) per source marker
+    links = []
+    
+    # One walk buckets each link into its nearest row - calling find() per row re-walks
+    # nested tables once for every enclosing row
+    for elem in elements:
+        attrs = adapter.attrs(elem)
+        is_link = adapter.tag(elem) == 'a'
+        if is_link:
+            if 'href' not in attrs:
+                continue
+            link = (attrs['href'] or '', adapter.link_text(elem))
+            links.append(link)
+        elif not is_source_marker(attrs):
+            continue
+        
+        row_keys = enclosing_rows(elem, adapter)
+        if not row_keys:
+            continue
+        
+        if not is_link:
+            markers.append((row_keys, adapter.text(elem)))
+            continue
+        
+        entry = rows.setdefault(row_keys[0], [None, '', ''])
+        if entry[0] is None and link[0]:
+            entry[0], entry[1] = link
+            for key in row_keys:
+                first_links.setdefault(key, entry)
+    
+    # A source label belongs to the nearest enclosing row that has a link. Labels in a link's own
+    # row go first - then, in nested tables, a label in a sibling row of the link's attaches
+    # through their shared outer row
+    own_row = [(row_keys[:1], text) for row_keys, text in markers if row_keys[0] in first_links]
+    outer_rows = [(row_keys, text) for row_keys, text in markers if row_keys[0] not in first_links]
+    for row_keys, text in own_row + outer_rows:
+        for key in row_keys:
+            entry = first_links.get(key)
+            if entry:
+                if not entry[2]:
+                    entry[2] = text
+                break
+    
+    return [tuple(entry) for entry in rows.values() if entry[0]], links
+
+def scan_alert_links_lexbor(html_content):
+    """scan_alert_links on selectolax's Lexbor tree"""
+    tree = LexborHTMLParser(html_content)
+    return bucket_alert_links(tree.css('a[href], font, span'), LEXBOR_ADAPTER)
+
+def scan_alert_links_soup(html_content):
+    """scan_alert_links on a BeautifulSoup tree"""
+    soup = parse_alert_html(html_content)
+    return bucket_alert_links(soup.find_all(['a', 'font', 'span']), SOUP_ADAPTER)
+
+MAX_ALERTS = 10  # alerts processed per email - later links are never looked at
+
+def build_alert(href, text, source=''):
+    """Alert record for one link, or None for Google's own links and short headlines"""
+    # Skip Google's own links
+    if SKIP_LINK_RE.search(href):
+        return None
+    
+    # Only keep links with a meaningful headline - checked before any URL work
+    # Add spaces between camelCase and fix spacing
+    headline = fix_text_spacing(text).strip()
+    if len(headline) <= 10:
+        return None
+    
+    # Extract actual URL from Google redirect
+    actual_url = extract_google_url(href)
+    if not actual_url:
+        return None
+    
+    return {
+        'headline': headline,
+        'url': actual_url,
+        'source': source,
+        'company': '',
+        'address': '',
+        'lead_summary': '',
+        'estimated_jobs': ''
+    }
 
 def parse_google_alert_email(html_content, subject):
     """Parse Google Alert email HTML - improved version"""
     alerts = []
     
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        logger.debug("Parsing Google Alert email...")
         
-        print("Parsing Google Alert email...")
+        rows, links = scan_alert_links(html_content)
         
-        # Find all table rows that contain alerts
-        for table in soup.find_all('table'):
-            for row in table.find_all('tr'):
-                # Look for links in the row
-                link = row.find('a', href=True)
-                if not link:
-                    continue
-                
-                href = link.get('href', '')
-                
-                # Skip Google's own links
-                if any(skip in href for skip in ['google.com/alerts', 'mailto:', '#', 'support.google']):
-                    continue
-                
-                # Extract actual URL from Google redirect
-                actual_url = extract_google_url(href)
-                
-                if actual_url:
-                    # Get the full text content from the link
-                    headline_parts = []
-                    for text in link.stripped_strings:
-                        headline_parts.append(text)
-                    
-                    # Join with spaces and clean up
-                    headline_text = ' '.join(headline_parts)
-                    
-                    # Add spaces between camelCase and fix spacing
-                    headline_text = fix_text_spacing(headline_text)
-                    
-                    alert = {
-                        'headline': headline_text.strip(),
-                        'url': actual_url,
-                        'source': '',
-                        'company': '',
-                        'address': '',
-                        'lead_summary': '',
-                        'estimated_jobs': ''
-                    }
-                    
-                    # Try to find source
-                    for elem in row.find_all(['font', 'span']):
-                        if elem.get('color') == '#006621' or (elem.get('style') and '006621' in elem.get('style', '')):
-                            alert['source'] = elem.get_text(strip=True)
-                            break
-                    
-                    # Only add if we have a meaningful headline
-                    if alert['headline'] and len(alert['headline']) > 10:
-                        alerts.append(alert)
-                        print(f"Found alert: {alert['headline'][:50]}...")
+        for href, text, source in rows:
+            alert = build_alert(href, text, source)
+            if alert:
+                alerts.append(alert)
+                logger.debug("Found alert: %.50s...", alert['headline'])
+                if len(alerts) == MAX_ALERTS:
+                    break
         
         # If no alerts found in tables, try direct link search
         if not alerts:
-            print("No alerts in tables, trying direct link search...")
-            all_links = soup.find_all('a', href=True)
+            logger.debug("No alerts in tables, trying direct link search...")
             
-            for link in all_links:
-                href = link.get('href', '')
-                
-                if any(skip in href for skip in ['google.com/alerts', 'mailto:', '#']):
-                    continue
-                
-                actual_url = extract_google_url(href)
-                
-                if actual_url:
-                    headline_parts = []
-                    for text in link.stripped_strings:
-                        headline_parts.append(text)
-                    
-                    headline_text = ' '.join(headline_parts)
-                    headline_text = fix_text_spacing(headline_text)
-                    
-                    alert = {
-                        'headline': headline_text.strip(),
-                        'url': actual_url,
-                        'source': '',
-                        'company': '',
-                        'address': '',
-                        'lead_summary': '',
-                        'estimated_jobs': ''
-                    }
-                    
-                    if alert['headline'] and len(alert['headline']) > 10:
-                        alerts.append(alert)
+            for href, text in links:
+                alert = build_alert(href, text)
+                if alert:
+                    alerts.append(alert)
+                    if len(alerts) == MAX_ALERTS:
+                        break
         
     except Exception as e:
-        print(f"Error parsing email: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error parsing email: %s", e)
     
-    print(f"Total alerts found: {len(alerts)}")
-    return alerts[:10]  # Limit to 10 alerts
+    logger.debug("Total alerts found: %d", len(alerts))
+    return alerts
+
+# One pass fixes all spacing - a space between lower and upper case ("AcmeExpands") and before the
+# last capital of a run ("ABCCorp"), and any whitespace run becomes a single space
+SPACING_RE = re.compile(r'\s+|(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+WHITESPACE_RE = re.compile(r'\s+')
 
+@lru_cache(maxsize=1024)
 def fix_text_spacing(text):
     """Fix spacing issues in text"""
-    # Add space between lowercase and uppercase
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-    # Add space between letter and uppercase letter
-    text = re.sub(r'([a-zA-Z])([A-Z][a-z])', r'\1 \2', text)
-    # Fix common patterns
-    text = re.sub(r'Company([A-Z])', r'Company \1', text)
-    text = re.sub(r'Expands([A-Z])', r'Expands \1', text)
-    text = re.sub(r'Announces([A-Z])', r'Announces \1', text)
-    text = re.sub(r'Million([A-Z])', r'Million \1', text)
-    text = re.sub(r'Manufacturing([A-Z])', r'Manufacturing \1', text)
-    # Normalize spaces
-    text = re.sub(r'\s+', ' ', text)
-    return text
+    return SPACING_RE.sub(' ', text)
 
+# The usual alert redirect - the target is the first url= query parameter
+GOOGLE_REDIRECT_RE = re.compile(r'https?://(?:www\.)?google\.com/url\?(?:[^#]*?&)??url=([^&#]+)')
+
+@lru_cache(maxsize=1024)
 def extract_google_url(url):
     """Extract actual URL from Google's redirect URL"""
-    if 'google.com/url?' in url:
-        match = re.search(r'url=([^&]+)', url)
-        if match:
-            return unquote(match.group(1))
-    elif url.startswith('http'):
-        return url
-    return None
+    # One regex match for the common shape, decoding only if something is encoded
+    match = GOOGLE_REDIRECT_RE.match(url)
+    if match:
+        target = match.group(1)
+        return unquote_plus(target) if '%' in target or '+' in target else target
+    
+    if 'google.com' not in url:
+        return url if url.startswith('http') else None
+    
+    parsed = urlparse(url)
+    if parsed.netloc.endswith('google.com') and parsed.path == '/url':
+        # parse_qs decodes the target and handles any parameter order
+        target = parse_qs(parsed.query).get('url')
+        return target[0] if target else None
+    return url if url.startswith('http') else None
+
+# Upper bound on the Jina response read per article - plenty of markdown for 8000 chars of content
+JINA_MAX_BYTES = 64 * 1024
+
+# Jina markdown cleanup
+MARKDOWN_TITLE_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+MARKDOWN_HEADER_RE = re.compile(r'^#+\s+', re.MULTILINE)
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+# Stored article length, and the prefix the cleanup runs over before falling back to the full text
+JINA_MAX_CHARS = 8000
+JINA_CLEANUP_CHARS = 2 * JINA_MAX_CHARS
+
+def clean_jina_markdown(content):
+    """Strip markdown headers and collapse blank lines"""
+    # Remove markdown headers but keep the text
+    content = MARKDOWN_HEADER_RE.sub('', content)
+    # Remove excess whitespace
+    return BLANK_LINES_RE.sub('\n\n', content)
 
-def fetch_article_with_jina(url):
+# Links Jina can't turn into article text - video, audio, images and archives
+MEDIA_URL_RE = re.compile(r'\.(?:mp4|m4v|mov|avi|wmv|webm|mp3|m4a|wav|jpe?g|png|gif|webp|svg|zip|gz)$', re.IGNORECASE)
+
+async def fetch_article_with_jina(url):
     """Use Jina Reader API to fetch article content - FREE and no API key needed!"""
     article_data = {
         'content': '',
@@ -277,71 +807,89 @@ def fetch_article_with_jina(url):
         'success': False
     }
     
+    # Don't spend a Jina request on media files - there is no article to read
+    if MEDIA_URL_RE.search(urlparse(url).path):
+        logger.info("Skipping non-article URL: %s", url)
+        article_data['content'] = "Could not fetch article content - link is a media file, not an article."
+        return article_data
+    
     try:
         # Jina Reader API - just prepend the URL
-        jina_url = f"https://r.jina.ai/{url}"
-        
-        print(f"Using Jina Reader to fetch: {url}")
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/plain'
-        }
+        jina_url = JINA_READER_URL + url
         
-        response = requests.get(jina_url, headers=headers, timeout=30)
+        logger.debug("Using Jina Reader to fetch: %s", url)
         
-        if response.status_code == 200:
-            content = response.text
-            
-            # Jina returns markdown, extract title if present
-            title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-            if title_match:
-                article_data['title'] = title_match.group(1).strip()
+        # Stream the body and stop reading at JINA_MAX_BYTES - only the first 8000 chars are kept
+        response = await send_with_retries(
+            JINA_CLIENT, 'GET', jina_url, JINA_RETRY_STATUSES, JINA_RETRIES
+        )
+        try:
+            content_type = response.headers.get('content-type', '')
+            if response.status_code == 200 and content_type and not content_type.startswith('text/'):
+                # Don't read a body we can't use
+                logger.warning("Jina Reader returned %s: %s", content_type, url)
+                article_data['content'] = f"Could not fetch article content - Jina Reader returned {content_type}"
             
-            # Clean up the content
-            # Remove markdown headers but keep the text
-            content = re.sub(r'^#+\s+', '', content, flags=re.MULTILINE)
-            # Remove excess whitespace
-            content = re.sub(r'\n{3,}', '\n\n', content)
+            elif response.status_code == 200:
+                raw = await read_limited(response, JINA_MAX_BYTES)
+                content = raw.decode(response.encoding or 'utf-8', errors='ignore')
+                
+                # Jina returns markdown, extract title if present
+                title_match = MARKDOWN_TITLE_RE.search(content)
+                if title_match:
+                    article_data['title'] = title_match.group(1).strip()
+                
+                # Clean up only a prefix cut at a line boundary - if the cleaned prefix still
+                # fills JINA_MAX_CHARS it matches the cleaned full text up to that length
+                if len(content) > JINA_CLEANUP_CHARS:
+                    prefix = content[:content.rfind('\n', 0, JINA_CLEANUP_CHARS) + 1]
+                    cleaned = clean_jina_markdown(prefix)
+                    content = cleaned if len(cleaned) >= JINA_MAX_CHARS else clean_jina_markdown(content)
+                else:
+                    content = clean_jina_markdown(content)
+                
+                if content and len(content) > 100:
+                    article_data['content'] = content[:JINA_MAX_CHARS]
+                    article_data['success'] = True
+                    logger.debug("Jina Reader success! Got %d characters", len(content))
+                else:
+                    logger.warning("Jina Reader couldn't extract meaningful content: %s", url)
+                    article_data['content'] = "Could not fetch article content - website may be blocking access."
             
-            if content and len(content) > 100:
-                article_data['content'] = content[:8000]  # Limit to 8000 chars
-                article_data['success'] = True
-                print(f"Jina Reader success! Got {len(content)} characters")
             else:
-                print(f"Jina Reader couldn't extract meaningful content")
-                article_data['content'] = "Could not fetch article content - website may be blocking access."
-                
-        else:
-            print(f"Jina Reader error {response.status_code}")
-            article_data['content'] = f"Could not fetch article content - Jina Reader returned error {response.status_code}"
+                logger.warning("Jina Reader error %d: %s", response.status_code, url)
+                article_data['content'] = f"Could not fetch article content - Jina Reader returned error {response.status_code}"
+        finally:
+            await response.aclose()
             
     except Exception as e:
-        print(f"Jina Reader exception: {e}")
+        logger.warning("Jina Reader exception: %s", e)
         article_data['content'] = f"Could not fetch article content - Error: {str(e)}"
     
     return article_data
 
-def extract_all_info_with_ai(content, headline, url=""):
-    """Use AI to extract all information at once"""
-    if not anthropic_client:
-        return {
-            'company': extract_company_name(headline),
-            'address': extract_location_from_headline(headline),
-            'jobs': extract_job_numbers(headline),
-            'summary': create_detailed_summary(headline, "", "", content)
-        }
-    
-    try:
-        # Check if we have actual content
-        has_content = content and len(content) > 200 and "Could not fetch" not in content
-        
-        prompt = f"""Analyze this article about industrial facility expansion and extract information. 
+JSON_DECODER = json.JSONDecoder()
 
-Article URL: {url}
-Article Headline: {headline}
+def extract_json(text, opener):
+    """Parse the JSON object ('{') or array ('[') in Claude's reply, in case there's extra text around it"""
+    # Usually the reply is just the JSON
+    try:
+        return json_loads(text)
+    except ValueError:
+        pass
+    
+    # raw_decode reads one complete value and ignores what follows - it handles nested braces and
+    # braces inside strings, unlike a regex
+    start = text.find(opener)
+    while start != -1:
+        try:
+            return JSON_DECODER.raw_decode(text, start)[0]
+        except ValueError:
+            start = text.find(opener, start + 1)
+    raise ValueError(f"No JSON {opener} in response")
 
-IMPORTANT: Focus on SPECIFIC FACILITY DETAILS, not generic statements about economic impact.
+# Shared extraction instructions for the single and batch AI prompts
+AI_EXTRACTION_RULES = """IMPORTANT: Focus on SPECIFIC FACILITY DETAILS, not generic statements about economic impact.
 
 1. COMPANY NAME: Extract the exact company name (just the company, no description)
 
@@ -406,140 +954,468 @@ IMPORTANT: Focus on SPECIFIC FACILITY DETAILS, not generic statements about econ
    - Any special features (automation, warehouse specs, utilities)
 
 DO NOT write generic statements like "strengthens the region's manufacturing sector" or "contributes to economic growth". 
-BE SPECIFIC about square footage, equipment, capabilities, and facility features.
+BE SPECIFIC about square footage, equipment, capabilities, and facility features."""
 
-{"Article content:" if has_content else "NOTE: Article content could not be fetched. Please provide what information you can from the headline and URL."}
-{content[:4000]}
+# Everything static goes in the system prompt, marked for prompt caching so repeat calls only pay
+# for the articles - single and batch calls share the one cached prefix
+AI_SYSTEM_PROMPT = [{
+    "type": "text",
+    "text": f"""You analyze articles about industrial facility expansion and extract information from them.
+
+{AI_EXTRACTION_RULES}
 
-Respond in this exact JSON format:
+RESPONSE FORMAT:
+For a single article, respond in this exact JSON format:
 {{
     "company": "Company Name",
     "address": "Full address or City, State",
     "jobs": "Number or empty string",
     "summary": "Detailed facility-focused paragraph with specific square footage, equipment, and operational details"
-}}"""
+}}
 
-        response = anthropic_client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=500,
-            temperature=0.1,
-            messages=[{"role": "user", "content": prompt}]
+For several numbered articles (ARTICLE 1, ARTICLE 2, ...), extract information from each one separately and respond with a JSON array containing exactly one object per article, with "id" set to the article number:
+[
+    {{
+        "id": 1,
+        "company": "Company Name",
+        "address": "Full address or City, State",
+        "jobs": "Number or empty string",
+        "summary": "Detailed facility-focused paragraph with specific square footage, equipment, and operational details"
+    }}
+]""",
+    "cache_control": {"type": "ephemeral"}
+}]
+
+def log_ai_usage(response):
+    """Log token usage - cache_read_input_tokens shows whether the cached system prompt was hit"""
+    usage = getattr(response, 'usage', None)
+    if usage:
+        logger.info(
+            "Claude usage: %s input, %s cache read, %s cache write, %s output",
+            usage.input_tokens, getattr(usage, 'cache_read_input_tokens', 0),
+            getattr(usage, 'cache_creation_input_tokens', 0), usage.output_tokens
         )
+
+# Output budget per article - without the article body only a short answer is possible
+AI_MAX_TOKENS = 500
+AI_HEADLINE_MAX_TOKENS = 150
+# Shorter headlines with no article body go straight to pattern matching - Claude adds nothing
+AI_MIN_HEADLINE_CHARS = 80
+AI_NO_CONTENT_NOTE = "NOTE: Article content could not be fetched. Please provide what information you can from the headline and URL, with a summary of one or two sentences."
+
+def is_headline_only(content, headline):
+    """True when there is too little to go on for a Claude call"""
+    return not has_article_content(content) and len(headline) < AI_MIN_HEADLINE_CHARS
+
+def ai_max_tokens(content):
+    """Output budget for one article"""
+    return AI_MAX_TOKENS if has_article_content(content) else AI_HEADLINE_MAX_TOKENS
+
+async def extract_all_info_with_ai(content, headline, url=""):
+    """Use AI to extract all information at once"""
+    if not anthropic_client or is_headline_only(content, headline):
+        return extract_all_info_with_patterns(content, headline)
+    
+    cache_key = ai_cache_key(content, headline)
+    cached = cache_get(AI_CACHE, cache_key)
+    if cached:
+        return cached
+    
+    try:
+        # Check if we have actual content
+        has_content = has_article_content(content)
+        
+        prompt = f"""Analyze this article about industrial facility expansion and extract information. 
+
+Article URL: {url}
+Article Headline: {headline}
+
+{"Article content:" if has_content else AI_NO_CONTENT_NOTE}
+{content[:4000]}
+
+Respond with a single JSON object."""
+
+        async with ANTHROPIC_SEMAPHORE:
+            response = await anthropic_client.messages.create(
+                model=ANTHROPIC_MODEL,
+                max_tokens=ai_max_tokens(content),
+                temperature=0.1,
+                system=AI_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}]
+            )
+        log_ai_usage(response)
         
         # Parse the JSON response
         response_text = response.content[0].text.strip()
         
-        # Extract JSON from response (in case there's extra text)
-        json_match = re.search(r'\{[^}]+\}', response_text, re.DOTALL)
-        if json_match:
-            response_text = json_match.group(0)
+        extracted = extract_json(response_text, '{')
+        
+        info = format_ai_extraction(extracted, headline, has_content)
+        cache_set(AI_CACHE, cache_key, info)
+        return info
         
-        extracted = json.loads(response_text)
+    except Exception as e:
+        logger.warning("AI extraction error: %s", e)
+        # Fallback to pattern matching
+        return extract_all_info_with_patterns(content, headline)
+
+AI_BATCH_SIZE = 8  # articles per Claude request - answers get less reliable past this
+
+async def extract_all_info_with_ai_batch(articles):
+    """Use AI to extract all information for several articles, reusing cached answers
+    
+    articles is a list of (content, headline, url) tuples - results come back in the same order
+    """
+    results = [cache_get(AI_CACHE, ai_cache_key(content, headline)) for content, headline, url in articles]
+    pending = [i for i, info in enumerate(results) if info is None]
+    if len(pending) < len(articles):
+        logger.info("AI cache hits: %d/%d", len(articles) - len(pending), len(articles))
+    
+    # Short headlines with no article body aren't worth a Claude call
+    for i in pending:
+        content, headline, url = articles[i]
+        if is_headline_only(content, headline):
+            results[i] = extract_all_info_with_patterns(content, headline)
+    pending = [i for i in pending if results[i] is None]
+    
+    # Batches of at most AI_BATCH_SIZE, sent concurrently - ANTHROPIC_SEMAPHORE caps the calls
+    batches = [pending[i:i + AI_BATCH_SIZE] for i in range(0, len(pending), AI_BATCH_SIZE)]
+    answers = await asyncio.gather(*[
+        # One article - the single prompt is shorter and needs no id matching
+        extract_all_info_with_ai(*articles[batch[0]]) if len(batch) == 1
+        else request_ai_extraction_batch([articles[i] for i in batch])
+        for batch in batches
+    ])
+    for batch, fresh in zip(batches, answers):
+        if len(batch) == 1:
+            fresh = [fresh]
+        for i, info in zip(batch, fresh):
+            results[i] = info
+    
+    return results
+
+async def request_ai_extraction_batch(articles):
+    """Send several articles to Claude in a single request"""
+    if not anthropic_client:
+        return [extract_all_info_with_patterns(content, headline) for content, headline, url in articles]
+    
+    try:
+        # Number every article so the answers can be matched back
+        article_blocks = []
+        for i, (content, headline, url) in enumerate(articles, 1):
+            has_content = has_article_content(content)
+            article_blocks.append(f"""ARTICLE {i}
+Article URL: {url}
+Article Headline: {headline}
+{"Article content:" if has_content else AI_NO_CONTENT_NOTE}
+{content[:4000]}""")
         
-        # Add note if content wasn't fetched
-        if not has_content:
-            extracted['summary'] = extracted.get('summary', '') + " [Note: Full article content could not be fetched]"
+        articles_text = "\n\n".join(article_blocks)
         
-        return {
-            'company': extracted.get('company', ''),
-            'address': extracted.get('address', ''),
-            'jobs': extracted.get('jobs', ''),
-            'summary': extracted.get('summary', headline)
-        }
+        prompt = f"""Analyze each of the following {len(articles)} articles about industrial facility expansion and extract information from each one separately.
+
+{articles_text}
+
+Respond with a JSON array containing exactly one object per article."""
+
+        async with ANTHROPIC_SEMAPHORE:
+            response = await anthropic_client.messages.create(
+                model=ANTHROPIC_MODEL,
+                max_tokens=sum(ai_max_tokens(content) for content, headline, url in articles),
+                temperature=0.1,
+                system=AI_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}]
+            )
+        log_ai_usage(response)
+        response_text = response.content[0].text.strip()
         
     except Exception as e:
-        print(f"AI extraction error: {e}")
+        logger.warning("AI batch extraction error: %s", e)
         # Fallback to pattern matching
-        return {
-            'company': extract_company_name(headline),
-            'address': extract_location_from_headline(headline),
-            'jobs': extract_job_numbers(headline),
-            'summary': create_detailed_summary(headline, "", "", content)
-        }
+        return [extract_all_info_with_patterns(content, headline) for content, headline, url in articles]
+    
+    extracted_by_id = {}
+    try:
+        for item in extract_json(response_text, '['):
+            if isinstance(item, dict):
+                extracted_by_id[str(item.get('id'))] = item
+    except (ValueError, TypeError) as e:
+        # The call worked but the array didn't - ask about each article on its own instead
+        logger.warning("Malformed AI batch response: %s", e)
+    
+    results = [None] * len(articles)
+    retry = []
+    for i, (content, headline, url) in enumerate(articles):
+        extracted = extracted_by_id.get(str(i + 1))
+        if not extracted:
+            retry.append(i)
+            continue
+        
+        # One bad answer only costs that article a retry, not the whole email
+        try:
+            info = format_ai_extraction(extracted, headline, has_article_content(content))
+        except ValueError as e:
+            logger.warning("Unusable AI answer for article %d: %s", i + 1, e)
+            retry.append(i)
+            continue
+        cache_set(AI_CACHE, ai_cache_key(content, headline), info)
+        results[i] = info
+    
+    if retry:
+        logger.warning("AI batch response missing or unusable for %d of %d articles - retrying them one at a time", len(retry), len(articles))
+    for i, info in zip(retry, await asyncio.gather(*[extract_all_info_with_ai(*articles[i]) for i in retry])):
+        results[i] = info
+    
+    return results
 
-def extract_company_name(text):
+def ai_cache_key(content, headline):
+    """Identical article bodies with the same headline reuse the same AI answer from the same model"""
+    return (ANTHROPIC_MODEL, hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest(), headline)
+
+def has_article_content(content):
+    """Check whether the fetched content is a real article and not an error message"""
+    return bool(content) and len(content) > 200 and "Could not fetch" not in content
+
+AI_FIELDS = ('company', 'address', 'jobs', 'summary')
+
+def format_ai_extraction(extracted, headline, has_content):
+    """Normalize one parsed AI answer into the extracted info dict - ValueError if a field is a list or object"""
+    info = {}
+    for field in AI_FIELDS:
+        value = extracted.get(field)
+        # null means Claude had nothing for the field - same as leaving it out
+        if value is None:
+            value = headline if field == 'summary' and has_content else ''
+        elif isinstance(value, (list, dict)):
+            raise ValueError(f"AI answer has a non-text {field}: {value!r}")
+        elif not isinstance(value, str):
+            # Job counts sometimes come back as a bare number
+            value = str(value)
+        info[field] = value
+    
+    # Add note if content wasn't fetched
+    if not has_content:
+        info['summary'] += " [Note: Full article content could not be fetched]"
+    
+    # Tells analyze_alerts this is a real answer and not the pattern fallback
+    info['from_ai'] = True
+    return info
+
+def extract_all_info_with_patterns(content, headline):
+    """Pattern-matching fallback when AI isn't available or fails"""
+    company = extract_company_name(headline)
+    address = extract_location_from_headline(headline)
+    return {
+        'company': company,
+        'address': address,
+        'jobs': extract_job_numbers(headline),
+        'summary': create_detailed_summary(headline, company, address, content)
+    }
+
+def compile_scanner(pattern):
+    """Compile a case-insensitive extraction pattern with RE2 when available, re otherwise"""
+    # Inline flag so the same pattern string works with both engines
+    pattern = '(?i)' + pattern
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except Exception as e:
+            logger.warning("RE2 can't compile %r, using re: %s", pattern, e)
+    return re.compile(pattern)
+
+# Company name patterns, tried in order
+COMPANY_PATTERNS = [compile_scanner(p) for p in (
+    # Company with suffix
+    r'([A-Z][A-Za-z0-9\s&\-\.\']+?)\s*(?:Inc\.?|LLC|Corp\.?|Corporation|Company|Co\.?|Ltd\.?|Limited|Group|Holdings|Industries|Manufacturing|Logistics|Properties|Partners|Enterprises|Systems|Technologies|Solutions)\b',
+    # Company before action verb
+    r'^([A-Z][A-Za-z0-9\s&\-\.\']+?)\s+(?:Announces|Expands|Opens|Plans|Invests|Develops|Acquires|to Build|Will Build)',
+    # Company in quotes
+    r'["\']([A-Z][A-Za-z0-9\s&\-\.\']+?)["\']',
+)]
+
+def find_company_name(text):
     """Extract company name using various patterns"""
     # Fix spacing first
     text = fix_text_spacing(text)
     
-    patterns = [
-        # Company with suffix
-        r'([A-Z][A-Za-z0-9\s&\-\.\']+?)\s*(?:Inc\.?|LLC|Corp\.?|Corporation|Company|Co\.?|Ltd\.?|Limited|Group|Holdings|Industries|Manufacturing|Logistics|Properties|Partners|Enterprises|Systems|Technologies|Solutions)\b',
-        # Company before action verb
-        r'^([A-Z][A-Za-z0-9\s&\-\.\']+?)\s+(?:Announces|Expands|Opens|Plans|Invests|Develops|Acquires|to Build|Will Build)',
-        # Company in quotes
-        r'["\']([A-Z][A-Za-z0-9\s&\-\.\']+?)["\']',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in COMPANY_PATTERNS:
+        match = pattern.search(text)
         if match:
             company = match.group(1).strip()
             # Clean up
-            company = re.sub(r'\s+', ' ', company)
+            company = WHITESPACE_RE.sub(' ', company)
             if 3 < len(company) < 50:
                 return company
     
     return ""
 
-def extract_location_from_headline(text):
+# US States
+US_STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
+    'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
+    'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
+    'WI': 'Wisconsin', 'WY': 'Wyoming'
+}
+
+# Every state form mapped to its full name - abbreviations must be upper case so words like
+# "in" or "me" aren't read as states, full names match in any case
+STATE_LOOKUP = {form.lower(): full for abbr, full in US_STATES.items() for form in (abbr, full)}
+STATE_RE = compile_scanner(
+    r'([A-Z][a-zA-Z\s]+?),?\s*\b('
+    + '|'.join(re.escape(full) for full in sorted(US_STATES.values(), key=len, reverse=True))
+    + '|(?-i:' + '|'.join(US_STATES) + r'))\b'
+)
+
+# Company names and common headline words stripped before looking for a location
+LOCATION_COMPANY_RE = compile_scanner(r'([A-Z][A-Za-z0-9\s&\-\.\']+?)\s*(?:Inc\.?|LLC|Corp\.?|Corporation|Company|Co\.?|Ltd\.?)')
+LOCATION_NOISE_RE = re.compile(r'\b(?:Announces|Expands|Opens|Plans|Million|Manufacturing|Expansion|Operations|Facility)\b', re.IGNORECASE)
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+if ahocorasick:
+    # One automaton pass finds every state mention - payload is (full name, abbreviation or None)
+    STATE_AUTOMATON = ahocorasick.Automaton()
+    for abbr, full in US_STATES.items():
+        STATE_AUTOMATON.add_word(full.lower(), (full, None))
+        STATE_AUTOMATON.add_word(abbr.lower(), (full, abbr))
+    STATE_AUTOMATON.make_automaton()
+
+# City right before a state mention - the same city rule as STATE_RE, anchored at the state
+CITY_PREFIX_RE = compile_scanner(r'([A-Z][a-zA-Z\s]+?),?\s*$')
+
+def is_word_char(char):
+    """Same test as a regex word character"""
+    return char.isalnum() or char == '_'
+
+def find_state_mentions(text):
+    """(city, state) candidates in text order - same matches as STATE_RE.finditer"""
+    lowered = text.lower()
+    if not ahocorasick or len(lowered) != len(text):
+        # lower() can change the length of some non-ASCII text, which breaks the offsets
+        return [(match.group(1), STATE_LOOKUP[match.group(2).lower()]) for match in STATE_RE.finditer(text)]
+    
+    # Leftmost state first, longest first at the same position - like the alternation
+    hits = sorted(
+        (end + 1 - len(abbr or full), -(end + 1), full, abbr)
+        for end, (full, abbr) in STATE_AUTOMATON.iter(lowered)
+    )
+    
+    mentions = []
+    last_end = 0
+    for start, neg_end, full, abbr in hits:
+        end = -neg_end
+        if start < last_end:
+            continue
+        # Whole words only, abbreviations in upper case only
+        if abbr and text[start:end] != abbr:
+            continue
+        if (start and is_word_char(text[start - 1])) or (end < len(text) and is_word_char(text[end])):
+            continue
+        city = CITY_PREFIX_RE.search(text[last_end:start])
+        if city:
+            mentions.append((city.group(1), full))
+            last_end = end
+    
+    return mentions
+
+def find_location(text):
     """Extract ONLY location from headline - no company names"""
     # Fix spacing first
     text = fix_text_spacing(text)
     
     # Remove company names and common words first
-    text = re.sub(r'([A-Z][A-Za-z0-9\s&\-\.\']+?)\s*(?:Inc\.?|LLC|Corp\.?|Corporation|Company|Co\.?|Ltd\.?)', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\b(?:Announces|Expands|Opens|Plans|Million|Manufacturing|Expansion|Operations|Facility)\b', '', text, flags=re.IGNORECASE)
-    
-    # US States
-    states = {
-        'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
-        'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
-        'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
-        'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
-        'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
-        'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
-        'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
-        'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
-        'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
-        'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
-        'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
-        'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
-        'WI': 'Wisconsin', 'WY': 'Wyoming'
-    }
+    text = LOCATION_COMPANY_RE.sub('', text)
+    text = LOCATION_NOISE_RE.sub('', text)
     
-    # Look for state and work backwards
-    for state_abbr, state_full in states.items():
-        # Try both abbreviation and full name
-        for state_form in [state_abbr, state_full]:
-            pattern = rf'([A-Z][a-zA-Z\s]+?),?\s*{re.escape(state_form)}\b'
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                city = match.group(1).strip()
-                # Clean city name
-                city = re.sub(r'\b\d+\b', '', city)  # Remove numbers
-                city = re.sub(r'\s+', ' ', city).strip()
-                if city and len(city) > 2:
-                    return f"{city}, {state_full}"
+    # Look for a state and work backwards - one pass over the text for all states
+    for city, state in find_state_mentions(text):
+        city = city.strip()
+        # Clean city name
+        city = NUMBER_RE.sub('', city)  # Remove numbers
+        city = WHITESPACE_RE.sub(' ', city).strip()
+        if city and len(city) > 2:
+            return f"{city}, {state}"
     
     return ""
 
-def extract_job_numbers(text):
+# Job count patterns, tried in order
+JOB_PATTERNS = [compile_scanner(p) for p in (
+    r'(\d{1,3}(?:,\d{3})*)\s*(?:new\s+)?(?:jobs?|positions?|employees?|workers?)',
+    r'(?:create|creating|add|adding|hire|hiring)\s+(?:up\s+to\s+)?(\d{1,3}(?:,\d{3})*)',
+    r'(?:employ|employing)\s+(?:up\s+to\s+)?(\d{1,3}(?:,\d{3})*)',
+    r'workforce\s+of\s+(\d{1,3}(?:,\d{3})*)',
+)]
+DIGIT_RE = re.compile(r'\d')
+
+def find_job_numbers(text):
     """Extract job creation numbers"""
-    patterns = [
-        r'(\d{1,3}(?:,\d{3})*)\s*(?:new\s+)?(?:jobs?|positions?|employees?|workers?)',
-        r'(?:create|creating|add|adding|hire|hiring)\s+(?:up\s+to\s+)?(\d{1,3}(?:,\d{3})*)',
-        r'(?:employ|employing)\s+(?:up\s+to\s+)?(\d{1,3}(?:,\d{3})*)',
-        r'workforce\s+of\s+(\d{1,3}(?:,\d{3})*)',
-    ]
+    # Every job pattern needs a digit - most headlines have none, so skip the scanners outright
+    if not DIGIT_RE.search(text):
+        return ""
     
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern in JOB_PATTERNS:
+        match = pattern.search(text)
         if match:
             return match.group(1)
     
     return ""
 
+@lru_cache(maxsize=1024)
+def scan_headline(text):
+    """Run every headline extractor once - the fallback path asks about the same headline repeatedly"""
+    return {
+        'company': find_company_name(text),
+        'address': find_location(text),
+        'jobs': find_job_numbers(text)
+    }
+
+def extract_company_name(text):
+    """Company name from the headline"""
+    return scan_headline(text)['company']
+
+def extract_location_from_headline(text):
+    """City, State from the headline"""
+    return scan_headline(text)['address']
+
+def extract_job_numbers(text):
+    """Job count from the headline"""
+    return scan_headline(text)['jobs']
+
+# Headline keywords the fallback summary branches on
+SUMMARY_KEYWORDS = (
+    'expands', 'announces', 'expansion', 'opens', 'invests', 'develops',
+    'warehouse', 'distribution', 'manufacturing', 'logistics'
+)
+
+if ahocorasick:
+    SUMMARY_AUTOMATON = ahocorasick.Automaton()
+    for keyword in SUMMARY_KEYWORDS:
+        SUMMARY_AUTOMATON.add_word(keyword, keyword)
+    SUMMARY_AUTOMATON.make_automaton()
+else:
+    # Lookahead so overlapping keywords are all reported, same as the automaton
+    SUMMARY_KEYWORDS_RE = re.compile('(?=(' + '|'.join(SUMMARY_KEYWORDS) + '))')
+
+def classify_headline(headline):
+    """Return the set of summary keywords found anywhere in the headline"""
+    headline_lower = headline.lower()
+    if ahocorasick:
+        return {keyword for _, keyword in SUMMARY_AUTOMATON.iter(headline_lower)}
+    return set(SUMMARY_KEYWORDS_RE.findall(headline_lower))
+
+# Headline patterns the fallback summary quotes from
+SUMMARY_COMPANY_RE = compile_scanner(r'^([A-Z][A-Za-z0-9\s&\-\.\']+?)\s+(?:Announces|Expands|Opens)')
+INVESTMENT_RE = compile_scanner(r'\$(\d+(?:,\d+)*(?:\.\d+)?)\s*(million|billion)?')
+SUMMARY_JOBS_RE = compile_scanner(r'(\d+(?:,\d+)*)\s*(?:new\s+)?(?:jobs?|positions?)')
+
 def create_detailed_summary(headline, company, location, content):
     """Create a detailed paragraph summary - fallback when AI isn't available"""
     # Fix spacing in headline first
@@ -557,34 +1433,37 @@ def create_detailed_summary(headline, company, location, content):
         summary = f"{company} "
     else:
         # Try to extract from headline
-        company_match = re.search(r'^([A-Z][A-Za-z0-9\s&\-\.\']+?)\s+(?:Announces|Expands|Opens)', headline, re.IGNORECASE)
+        company_match = SUMMARY_COMPANY_RE.search(headline)
         if company_match:
             summary = f"{company_match.group(1).strip()} "
         else:
             summary = "The company "
     
+    # Find every keyword in one pass over the headline
+    tags = classify_headline(headline)
+    
     # Action part
-    if "expands" in headline.lower():
+    if "expands" in tags:
         summary += "is expanding its operations "
-    elif "announces" in headline.lower() and "expansion" in headline.lower():
+    elif "announces" in tags and "expansion" in tags:
         summary += "has announced plans for a major expansion "
-    elif "opens" in headline.lower():
+    elif "opens" in tags:
         summary += "is opening a new facility "
-    elif "invests" in headline.lower():
+    elif "invests" in tags:
         summary += "is making a significant investment "
-    elif "develops" in headline.lower():
+    elif "develops" in tags:
         summary += "is developing new facilities "
     else:
         summary += "has announced new industrial development "
     
     # Facility type
-    if "warehouse" in headline.lower():
+    if "warehouse" in tags:
         summary += "with a new warehouse facility "
-    elif "distribution" in headline.lower():
+    elif "distribution" in tags:
         summary += "with a distribution center "
-    elif "manufacturing" in headline.lower():
+    elif "manufacturing" in tags:
         summary += "with manufacturing operations "
-    elif "logistics" in headline.lower():
+    elif "logistics" in tags:
         summary += "with logistics facilities "
     else:
         summary += ""
@@ -601,13 +1480,13 @@ def create_detailed_summary(headline, company, location, content):
             summary += "at a new location. "
     
     # Investment amount
-    investment_match = re.search(r'\$(\d+(?:,\d+)*(?:\.\d+)?)\s*(million|billion)?', headline, re.IGNORECASE)
+    investment_match = INVESTMENT_RE.search(headline)
     if investment_match:
         amount = investment_match.group(0)
         summary += f"The project represents an investment of {amount}. "
     
     # Jobs
-    job_match = re.search(r'(\d+(?:,\d+)*)\s*(?:new\s+)?(?:jobs?|positions?)', headline, re.IGNORECASE)
+    job_match = SUMMARY_JOBS_RE.search(headline)
     if job_match:
         jobs = job_match.group(0)
         summary += f"The expansion is expected to create {jobs}. "
@@ -617,68 +1496,105 @@ def create_detailed_summary(headline, company, location, content):
     
     return summary.strip()
 
-def send_to_smartsuite(alert_data):
-    """Send record to SmartSuite"""
+def parse_alert_date(value):
+    """Parse an alert date to ISO-8601 - stdlib fast path, dateutil for anything else"""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).isoformat()
+    except ValueError:
+        if date_parser is None:
+            raise
+        return date_parser.parse(value).isoformat()
+
+# SmartSuite field id, alert key and length limit for each copied field - empty values are left out
+SMARTSUITE_FIELD_MAP = (
+    ("sc373e6626", 'company', None),  # company
+    ("s46434c9b6", 'address', None),  # address - as text field
+    ("s492934214", 'lead_summary', 1000),  # lead_summary - longer
+    ("sa8ca8dbcb", 'estimated_jobs', None),  # estimated_new_jobs
+    ("s8e6e9fe79", 'url', None),  # article_url
+    ("s6e74e1ce5", 'source', 100),  # source
+)
+SMARTSUITE_DATE_FIELD = "s8d5616e3e"
+
+def build_smartsuite_payload(alert_data):
+    """Build the SmartSuite record for one alert"""
+    # Format date
+    try:
+        if 'date' in alert_data and alert_data['date']:
+            formatted_date = parse_alert_date(alert_data['date'])
+        else:
+            formatted_date = datetime.now().isoformat()
+    except:
+        formatted_date = datetime.now().isoformat()
+    
+    # Create unique title
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_title = (alert_data.get('company') or alert_data.get('headline', 'New Lead'))[:80]
+    unique_title = f"{base_title} - {timestamp}"
+    
+    # Build payload - only non-empty fields are copied, so there is nothing to clean up after
+    payload = {"title": unique_title, SMARTSUITE_DATE_FIELD: formatted_date}
+    for field_id, key, limit in SMARTSUITE_FIELD_MAP:
+        value = alert_data.get(key)
+        if value:
+            payload[field_id] = value[:limit] if limit else value
+    return payload
+
+def match_created_records(items, created):
+    """Whether each sent item is among the records the bulk insert returned"""
+    created_titles = [record.get('title') for record in created if isinstance(record, dict)]
+    # The created records come back in request order
+    if created_titles == [item['title'] for item in items]:
+        return [True] * len(items)
+    
+    # Titles aren't unique - alerts about the same company in one batch share the second-resolution
+    # timestamp - so count them, and only confirm a shared title if every copy came back
+    created_counts = Counter(created_titles)
+    sent_counts = Counter(item['title'] for item in items)
+    return [created_counts[item['title']] >= sent_counts[item['title']] for item in items]
+
+async def send_batch_to_smartsuite(alerts):
+    """Send records to SmartSuite with one bulk insert - returns (success, message) per alert"""
     try:
         # Check if we have API key
         if not SMARTSUITE_API_KEY:
-            print("ERROR: No SmartSuite API key found in environment variables!")
-            return False, "Missing SmartSuite API key"
-            
-        url = f"https://app.smartsuite.com/api/v1/applications/{SMARTSUITE_TABLE_ID}/records/"
+            logger.error("No SmartSuite API key found in environment variables!")
+            return [(False, "Missing SmartSuite API key")] * len(alerts)
         
-        headers = {
-            "Authorization": f"Token {SMARTSUITE_API_KEY}",
-            "ACCOUNT-ID": SMARTSUITE_WORKSPACE,
-            "Content-Type": "application/json"
-        }
+        items = [build_smartsuite_payload(alert) for alert in alerts]
         
-        # Format date
-        try:
-            if 'date' in alert_data and alert_data['date']:
-                from dateutil import parser
-                date_obj = parser.parse(alert_data['date'])
-                formatted_date = date_obj.isoformat()
-            else:
-                formatted_date = datetime.now().isoformat()
-        except:
-            formatted_date = datetime.now().isoformat()
-        
-        # Create unique title
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_title = (alert_data.get('company') or alert_data.get('headline', 'New Lead'))[:80]
-        unique_title = f"{base_title} - {timestamp}"
-        
-        # Build payload
-        payload = {
-            "title": unique_title,
-            "sc373e6626": alert_data.get('company', ''),  # company
-            "s46434c9b6": alert_data.get('address', ''),  # address - as text field
-            "s492934214": alert_data.get('lead_summary', '')[:1000],  # lead_summary - longer
-            "sa8ca8dbcb": alert_data.get('estimated_jobs', ''),  # estimated_new_jobs
-            "s8e6e9fe79": alert_data.get('url', ''),  # article_url
-            "s8d5616e3e": formatted_date,  # date
-            "s6e74e1ce5": alert_data.get('source', '')[:100]  # source
-        }
+        logger.info("Sending %d records to SmartSuite", len(items))
         
-        # Clean payload - remove empty values
-        payload = {k: v for k, v in payload.items() if v and v != ''}
-        
-        print(f"Sending to SmartSuite: {unique_title}")
-        
-        response = requests.post(url, headers=headers, json=payload)
+        response = await SMARTSUITE_CLIENT.post(
+            SMARTSUITE_BULK_URL, content=json_dumps({"items": items}), headers=JSON_CONTENT_TYPE
+        )
         
         if response.status_code in [200, 201]:
-            return True, "Successfully sent to SmartSuite"
+            # Bulk insert returns the created records - match them back to the alerts
+            created = json_loads(response.content)
+            if not isinstance(created, list):
+                created = []
+            matched = match_created_records(items, created)
+            if not all(matched):
+                logger.warning("SmartSuite returned %d records for %d sent - %d confirmed", len(created), len(items), sum(matched))
+            return [
+                (True, "Successfully sent to SmartSuite") if ok
+                else (False, "SmartSuite bulk insert did not return this record")
+                for ok in matched
+            ]
         else:
             error_msg = f"SmartSuite error {response.status_code}: {response.text[:200]}"
-            print(error_msg)
-            return False, error_msg
+            logger.error(error_msg)
+            return [(False, error_msg)] * len(items)
             
     except Exception as e:
         error_msg = f"Exception: {str(e)}"
-        print(error_msg)
-        return False, error_msg
+        logger.exception("SmartSuite bulk insert failed: %s", e)
+        return [(False, error_msg)] * len(alerts)
+
+# Start the background worker with the app
+threading.Thread(target=alert_worker, name='alert-worker', daemon=True).start()
+threading.Thread(target=alert_dispatcher, name='alert-dispatcher', daemon=True).start()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
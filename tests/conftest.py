@@ -0,0 +1,5 @@
+import os
+import sys
+
+# app.py lives at the repo root, not in a package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,46 @@
+"""Headline/article extraction - the pattern fallback and normalizing Claude's answers"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import app
+
+ARTICLE = 'Tesla will build a large factory near Austin. ' * 10
+
+def test_pattern_summary_names_the_extracted_company():
+    info = app.extract_all_info_with_patterns(ARTICLE, "Tesla to build factory in Austin, Texas, hiring 5,000")
+    assert info['company'] == 'Tesla'
+    assert info['summary'].startswith('Tesla has announced')
+
+def test_ai_answer_with_null_or_numeric_jobs_is_kept():
+    for jobs, expected in ((None, ''), (300.0, '300.0'), (300, '300')):
+        answer = {'company': 'Acme', 'address': 'Austin, Texas', 'jobs': jobs, 'summary': 'A plant'}
+        info = app.format_ai_extraction(answer, 'Acme builds a plant', has_content=True)
+        assert info['jobs'] == expected
+        assert info['company'] == 'Acme' and info['summary'] == 'A plant'
+
+def test_ai_answer_with_null_summary_falls_back_to_headline():
+    info = app.format_ai_extraction({'company': 'Acme', 'summary': None}, 'Acme builds a plant', has_content=True)
+    assert info['summary'] == 'Acme builds a plant'
+
+def test_ai_answer_with_list_field_is_rejected():
+    with pytest.raises(ValueError):
+        app.format_ai_extraction({'company': ['Acme', 'Widget']}, 'Acme builds a plant', has_content=True)
+
+def test_batch_keeps_answers_with_null_jobs(monkeypatch):
+    calls = []
+    
+    async def create(**kwargs):
+        calls.append(kwargs)
+        answers = [{'id': i, 'company': f'Co{i}', 'address': '', 'jobs': None, 'summary': 's'} for i in (1, 2, 3)]
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(answers))], usage=None)
+    
+    monkeypatch.setattr(app, 'anthropic_client', SimpleNamespace(messages=SimpleNamespace(create=create)))
+    articles = [(ARTICLE + str(i), f'Headline {i} about a plant', f'https://a.com/{i}') for i in (1, 2, 3)]
+    results = asyncio.run(app.extract_all_info_with_ai_batch(articles))
+    
+    assert len(calls) == 1
+    assert [info['company'] for info in results] == ['Co1', 'Co2', 'Co3']
+    assert all(info['jobs'] == '' and info['from_ai'] for info in results)
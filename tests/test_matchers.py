@@ -0,0 +1,80 @@
+"""Hand-written matchers against the regex logic they replaced - random inputs, fixed seeds"""
+import random
+import re
+from urllib.parse import urlparse, parse_qs, quote
+
+import pytest
+
+import app
+
+SAMPLES = 20000
+
+# find_state_mentions - reference is the STATE_RE alternation it reimplements
+STATE_WORDS = [
+    'Plant', 'in', 'Little', 'Rock', ',', 'Arkansas', 'TX', 'tx', 'Dallas', 'New', 'York', 'North',
+    'Carolina', 'Kansas', 'IN', 'Indiana', '300', 'Co', 'Mexico', 'West', 'Virginia', 'VA', 'Ohio',
+    'Columbus', 'ohio', 'Texas', 'Texan', '-', ', ', 'OR', 'or', 'Oregon', 'WA', 'Washington', 'DC',
+    '.', '$5', 'NewYork', 'TXA', 'Kansas_', 'Köln',
+]
+
+def reference_state_mentions(text):
+    return [(match.group(1), app.STATE_LOOKUP[match.group(2).lower()]) for match in app.STATE_RE.finditer(text)]
+
+@pytest.mark.skipif(app.ahocorasick is None, reason="find_state_mentions only uses STATE_RE without pyahocorasick")
+def test_find_state_mentions_matches_state_re():
+    rng = random.Random(1)
+    for _ in range(SAMPLES):
+        text = ' '.join(rng.choice(STATE_WORDS) for _ in range(rng.randint(1, 12)))
+        text = text.replace(' , ', rng.choice([', ', ',', ' ,', ' , ']))
+        assert app.find_state_mentions(text) == reference_state_mentions(text), text
+
+# fix_text_spacing - reference is the four substitutions SPACING_RE folded into one pass
+CAMEL_CASE_RE = re.compile(r'([a-z])([A-Z])')
+CAPITALIZED_WORD_RE = re.compile(r'([a-zA-Z])([A-Z][a-z])')
+GLUED_KEYWORD_RE = re.compile(r'(Company|Expands|Announces|Million|Manufacturing)([A-Z])')
+
+def reference_fix_text_spacing(text):
+    text = CAMEL_CASE_RE.sub(r'\1 \2', text)
+    text = CAPITALIZED_WORD_RE.sub(r'\1 \2', text)
+    text = GLUED_KEYWORD_RE.sub(r'\1 \2', text)
+    return app.WHITESPACE_RE.sub(' ', text)
+
+SPACING_PIECES = ['a', 'b', 'A', 'B', 'Ab', 'ABC', 'Corp', 'Expands', 'Million', 'Company', ' ', '  ', '\t', '\n', '1', '-', 'é', 'É']
+
+def test_fix_text_spacing_matches_multi_step_version():
+    rng = random.Random(2)
+    for _ in range(SAMPLES):
+        text = ''.join(rng.choice(SPACING_PIECES) for _ in range(rng.randint(0, 15)))
+        assert app.fix_text_spacing.__wrapped__(text) == reference_fix_text_spacing(text), text
+
+# extract_google_url - reference is the urlparse/parse_qs resolver GOOGLE_REDIRECT_RE short-circuits
+def reference_google_url(url):
+    parsed = urlparse(url)
+    if parsed.netloc.endswith('google.com') and parsed.path == '/url':
+        target = parse_qs(parsed.query).get('url')
+        return target[0] if target else None
+    return url if url.startswith('http') else None
+
+URL_PREFIXES = [
+    'https://www.google.com/url?', 'http://google.com/url?', 'https://news.google.com/url?',
+    'https://www.google.com/alerts?', 'https://example.com/url?', '/url?', 'mailto:x@y.com?',
+]
+URL_TARGETS = ['https://a.com/x', 'https://b.org/p?q=1&r=2', 'https://c.net/a b', 'https://d.io/100%', 'https://e.com/+x', '']
+URL_PARAMS = ['rct=j', 'sa=t', 'ct=ga', 'usg=AOv', 'url=', 'url=https://g.com/second', 'q=x', '', 'a=%26', '=b']
+
+def random_redirect(rng):
+    params = [rng.choice(URL_PARAMS) for _ in range(rng.randint(0, 3))]
+    target = rng.choice(URL_TARGETS)
+    if rng.random() < 0.5:
+        target = quote(target, safe=rng.choice(['', ':/', ':/?=&']))
+    params.insert(rng.randint(0, len(params)), 'url=' + target)
+    url = rng.choice(URL_PREFIXES) + rng.choice(['&', '&&', ';']).join(params)
+    if rng.random() < 0.2:
+        url += '#' + rng.choice(['frag', 'url=https://f.com', ''])
+    return url
+
+def test_extract_google_url_matches_parse_qs():
+    rng = random.Random(3)
+    for _ in range(SAMPLES):
+        url = random_redirect(rng)
+        assert app.extract_google_url.__wrapped__(url) == reference_google_url(url), url